@@ -9,16 +9,19 @@ import sys
 import time
 import cv2
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Flask, Response, jsonify
-from picamera2 import Picamera2
+from picamera2 import Picamera2, MappedArray
 import threading
+import queue
 import gc
+import numpy as np
 
 # Add lib directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
 
 try:
-    from face_detection import create_face_detector
+    from face_detection import create_face_detector, render_text_mask, blit_text_mask
     from grayscale_handler import create_grayscale_handler
     from compression_handler import create_compression_handler
 
@@ -33,11 +36,60 @@ except ImportError as e:
 
 app = Flask(__name__)
 
+# Per-frame logging (database uploads, detected faces), off by default
+VERBOSE = os.environ.get("BADS_VERBOSE") == "1"
+
+# Target frame rate of the /stream MJPEG stream (kept low for the ESP32)
+STREAM_FPS = 10
+
+# /stream JPEG quality range, lowered while a client drains the stream slowly
+STREAM_QUALITY_MIN = 50
+STREAM_QUALITY_MAX = 80
+
+# Minimum time between camera captures; faster requests reuse the last frame
+MIN_CAPTURE_INTERVAL = 1.0 / 30
+
 # Database server configuration
 DATABASE_SERVER_IP = "192.168.18.11"
 DATABASE_SERVER_PORT = 3000
 DATABASE_URL = f"http://{DATABASE_SERVER_IP}:{DATABASE_SERVER_PORT}/api/capture"
 
+# JPEG quality of frames uploaded to the database server
+UPLOAD_QUALITY = 80
+
+# Frames waiting for the upload worker; when the database server falls
+# behind, the oldest queued frame is dropped
+UPLOAD_QUEUE_SIZE = 4
+
+
+def adapt_stream_quality(quality, send_time, period):
+    """
+    Step stream JPEG quality down while the client is slow to take frames,
+    and back up once it keeps up again
+
+    Args:
+        quality: Current JPEG quality
+        send_time: Smoothed time spent handing one frame to the client (s)
+        period: Frame period of the stream (s)
+
+    Returns:
+        int: New JPEG quality
+    """
+    if send_time > period * 0.5:
+        return max(quality - 5, STREAM_QUALITY_MIN)
+    if send_time < period * 0.1:
+        return min(quality + 5, STREAM_QUALITY_MAX)
+    return quality
+
+
+def encode_jpeg(frame, quality):
+    """Basic JPEG encoding, used when the lib handlers are not available"""
+    success, jpeg_buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if success:
+        return jpeg_buffer.tobytes()
+    print("JPEG encoding failed")
+    return None
+
 
 class CameraServer:
     def __init__(self):
@@ -45,32 +97,62 @@ class CameraServer:
         self.face_detector = None
         self.grayscale_handler = None
         self.compression_handler = None
-        self.detected_faces = []
-        self.last_detection_time = 0
+        self.detected_faces = np.empty((0, 4), dtype=np.int32)  # (N, 4) x, y, w, h
         self.detection_interval = 2.0
         self.face_detection_enabled = False
         self.grayscale_enabled = False
         self.lock = threading.Lock()
+        self.verbose = VERBOSE
+
+        self.frame_size = (320, 240)  # (width, height) of the camera stream
+
+        # Last result list seen from the (background) face detector
+        self._faces_seen = None
 
-    def send_frame_to_database(self, jpeg_data):
-        """Send grayscale frame data to database server"""
+        # Per-frame drawing buffer, reused across captures (guarded by self.lock)
+        self._gray_draw = None
+
+        # "FACE" label rasterized once, painted above each face box
+        self._face_label = None
+
+        # Last captured Y plane (reused buffer), shared by requests arriving
+        # faster than the sensor
+        self._last_frame = None
+        self._last_frame_time = 0.0
+
+        # Database uploads: one worker thread (started on first use) drains
+        # this queue over a single keep-alive connection
+        self._upload_queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        self._upload_thread = None
+
+    def send_frame_to_database(self, jpeg_data, session=None, timestamp=None):
+        """
+        Send grayscale frame data to database server
+
+        Args:
+            jpeg_data: JPEG bytes to upload
+            session: requests.Session to reuse connections (one-off post if None)
+            timestamp: Capture time (defaults to now)
+        """
         try:
             # Prepare the file data for multipart/form-data
             files = {"image": ("frame.jpg", jpeg_data, "image/jpeg")}
 
             # Optional: Add additional data as form fields
             data = {
-                "timestamp": str(time.time()),
+                "timestamp": str(time.time() if timestamp is None else timestamp),
                 "format": "jpeg",
                 "grayscale": "true",
                 "resolution": "320x240",
             }
 
             # Send to database server with timeout using form-data
-            response = requests.post(DATABASE_URL, files=files, data=data, timeout=5)
+            post = requests.post if session is None else session.post
+            response = post(DATABASE_URL, files=files, data=data, timeout=5)
 
             if response.status_code == 200:
-                print("Frame sent to database successfully")
+                if self.verbose:
+                    print("Frame sent to database successfully")
             else:
                 print(f"Database server responded with status: {response.status_code}")
 
@@ -83,13 +165,66 @@ class CameraServer:
         except Exception as e:
             print(f"Error sending frame to database: {e}")
 
+    def send_frame_to_database_async(self, jpeg_data=None, gray_frame=None):
+        """
+        Queue a frame for the upload worker (called with self.lock held)
+
+        Never blocks: if the database server is behind and the queue is full,
+        the oldest queued frame is dropped in favour of this one.
+
+        Args:
+            jpeg_data: JPEG bytes already encoded at UPLOAD_QUALITY, or None
+            gray_frame: Grayscale frame the worker encodes at UPLOAD_QUALITY
+                        when jpeg_data is None (must not be reused by the caller)
+        """
+        if self._upload_thread is None:
+            self._upload_thread = threading.Thread(target=self._upload_worker, daemon=True)
+            self._upload_thread.start()
+
+        item = (jpeg_data, gray_frame, time.time())
+        try:
+            self._upload_queue.put_nowait(item)
+        except queue.Full:
+            try:
+                self._upload_queue.get_nowait()
+            except queue.Empty:
+                pass  # Worker took it meanwhile
+            # Only producer (under self.lock) and one slot just freed
+            self._upload_queue.put_nowait(item)
+
+    def _upload_worker(self):
+        """Upload worker loop: sends queued frames one at a time over one session"""
+        # Owned by this thread only; uploads are sequential, so one pooled
+        # keep-alive connection is enough
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+        while True:
+            jpeg_data, gray_frame, timestamp = self._upload_queue.get()
+            # Log and move on: an uncaught error would silently end this thread
+            try:
+                if jpeg_data is None:
+                    # Encoded here, off self.lock
+                    if self.grayscale_handler:
+                        jpeg_data = self.grayscale_handler.get_grayscale_jpeg(
+                            gray_frame, quality=UPLOAD_QUALITY
+                        )
+                    else:
+                        jpeg_data = encode_jpeg(gray_frame, UPLOAD_QUALITY)
+                    if not jpeg_data:
+                        continue
+                self.send_frame_to_database(jpeg_data, session=session, timestamp=timestamp)
+            except Exception as e:
+                print(f"Upload worker error: {e}")
+
     def initialize_camera(self):
         """Initialize Picamera2 with ESP32-optimized settings"""
         self.picam2 = Picamera2()
 
-        # Configure for 320x240 to match ESP32 requirements
+        # Configure for 320x240 to match ESP32 requirements. YUV420 so the
+        # ISP's Y plane can be used directly as the grayscale image
         config = self.picam2.create_still_configuration(
-            main={"size": (320, 240), "format": "RGB888"},
+            main={"size": self.frame_size, "format": "YUV420"},
             buffer_count=2,
         )
 
@@ -101,7 +236,13 @@ class CameraServer:
     def enable_face_detection(self):
         """Enable face detection if available"""
         if FACE_DETECTION_AVAILABLE:
-            self.face_detector = create_face_detector(lightweight=True)
+            # Detection runs on the detector's own thread so a slow cascade
+            # never stalls /frame or /stream
+            self.face_detector = create_face_detector(lightweight=True, background=True)
+            self.face_detector.detection_interval = self.detection_interval
+            self.face_detector.verbose = self.verbose
+            # Pay the first-detection setup cost now, not on a client's frame
+            self.face_detector.warm_up(self.frame_size)
             self.face_detection_enabled = True
             print("Face detection enabled")
         else:
@@ -124,197 +265,147 @@ class CameraServer:
         else:
             print("Compression handler not available")
 
-    def process_frame_with_faces(self, frame):
-        """Add face detection to frame"""
-        current_time = time.time()
-
-        # Run face detection periodically
-        if (
-            self.face_detector
-            and (current_time - self.last_detection_time) > self.detection_interval
-        ):
-            # Convert RGB to BGR for OpenCV
-            bgr_frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-            faces = self.face_detector.detect_faces(bgr_frame)
-
-            if len(faces) > 0:
-                # Keep only the largest face for better performance
-                largest_face = max(faces, key=lambda face: face[2] * face[3])
-                self.detected_faces = [largest_face]
-                print(f"Face detected: {largest_face}")
-            else:
-                self.detected_faces = []
-
-            self.last_detection_time = current_time
-
-        # Draw face boxes
-        if len(self.detected_faces) > 0:
-            for x, y, w, h in self.detected_faces:
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(
-                    frame,
-                    "FACE",
-                    (x, y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (0, 255, 0),
-                    1,
-                )
-
-        return frame
-
-    def process_frame_with_faces_on_grayscale(self, gray_single_channel, gray_frame_bgr):
-        """Optimized face detection on grayscale image"""
-        current_time = time.time()
-
-        # Run face detection periodically on grayscale image (more efficient)
+    def _set_detected_faces(self, faces):
+        """Keep only the largest face for better performance"""
+        if len(faces) > 0:
+            largest = np.argmax(faces[:, 2] * faces[:, 3])
+            self.detected_faces = faces[largest : largest + 1]
+            if self.verbose:
+                print(f"Face detected: {self.detected_faces[0].tolist()}")
+        else:
+            self.detected_faces = faces
+
+    def process_frame_with_faces_on_grayscale(self, gray_frame):
+        """
+        Optimized face detection on the single-channel grayscale image
+
+        Boxes are drawn in white on a copy, so the captured frame (which may
+        be reused by the next request) stays clean.
+        """
+        if self.face_detector:
+            # Paced by the detector itself: submits the frame to its worker
+            # when due and returns the latest results without blocking
+            faces = self.face_detector.detect_faces(gray_frame)
+
+            # The detector returns its same cached (N, 4) array object (or the
+            # shared empty _NO_FACES array) until the worker finishes a new
+            # detection, so identity tells whether the result changed
+            if faces is not self._faces_seen:
+                self._faces_seen = faces
+                self._set_detected_faces(faces)
+
+        if len(self.detected_faces) == 0:
+            return gray_frame
+
+        # Draw face boxes on a reused single-channel buffer
+        if self._gray_draw is None or self._gray_draw.shape != gray_frame.shape:
+            self._gray_draw = np.empty_like(gray_frame)
+        np.copyto(self._gray_draw, gray_frame)
+        if self._face_label is None:
+            self._face_label = render_text_mask("FACE")
+        for x, y, w, h in self.detected_faces.tolist():
+            cv2.rectangle(self._gray_draw, (x, y), (x + w, y + h), 255, 2)
+            blit_text_mask(self._gray_draw, self._face_label, (x, y - 10), 255)
+
+        return self._gray_draw
+
+    def _capture_frame(self):
+        """
+        Capture a grayscale frame, or reuse the last one if it is younger than
+        MIN_CAPTURE_INTERVAL
+
+        Only the Y plane of the YUV420 buffer is copied out, straight from the
+        mapped camera buffer into a reused array; the request is then handed
+        back to the camera.
+
+        Returns:
+            tuple: (gray_frame, is_new) - is_new is False when the cached frame was reused
+        """
+        now = time.monotonic()
         if (
-            self.face_detector
-            and (current_time - self.last_detection_time) > self.detection_interval
+            self._last_frame is not None
+            and now - self._last_frame_time < MIN_CAPTURE_INTERVAL
         ):
-            # Face detector expects BGR format, so use the 3-channel grayscale
-            faces = self.face_detector.detect_faces(gray_frame_bgr)
-
-            if len(faces) > 0:
-                # Keep only the largest face for better performance
-                largest_face = max(faces, key=lambda face: face[2] * face[3])
-                self.detected_faces = [largest_face]
-                print(f"Face detected: {largest_face}")
-            else:
-                self.detected_faces = []
-
-            self.last_detection_time = current_time
-
-        # Draw face boxes on the 3-channel grayscale image
-        if len(self.detected_faces) > 0:
-            for x, y, w, h in self.detected_faces:
-                cv2.rectangle(gray_frame_bgr, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(
-                    gray_frame_bgr,
-                    "FACE",
-                    (x, y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (0, 255, 0),
-                    1,
-                )
-
-        return gray_frame_bgr
+            return self._last_frame, False
+
+        width, height = self.frame_size
+        if self._last_frame is None:
+            self._last_frame = np.empty((height, width), dtype=np.uint8)
+
+        request = self.picam2.capture_request()
+        try:
+            with MappedArray(request, "main") as mapped:
+                # The first `height` rows of a YUV420 buffer are the luma plane
+                np.copyto(self._last_frame, mapped.array[:height, :width])
+        finally:
+            request.release()
+
+        self._last_frame_time = now
+        return self._last_frame, True
+
+    def _encode_grayscale(self, gray_frame, quality):
+        """Encode a single-channel frame with the grayscale handler, or basic encoding"""
+        if self.grayscale_handler:
+            return self.grayscale_handler.get_grayscale_jpeg(gray_frame, quality=quality)
+        return encode_jpeg(gray_frame, quality)
+
+    def _compress(self, frame, quality):
+        """Encode a frame with the compression handler, falling back to basic encoding"""
+        if self.compression_handler:
+            compressed_data = self.compression_handler.compress_image(frame, quality=quality)
+            if compressed_data:
+                return compressed_data
+        return encode_jpeg(frame, quality)
 
     def capture_jpeg(self):
         """Capture a single JPEG frame with optimized processing flow"""
         try:
             with self.lock:
-                # Step 1: Capture frame
-                frame = self.picam2.capture_array()
-
-                # Step 2: Convert RGB to BGR for OpenCV processing
-                bgr_frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-                # Step 3: Convert to grayscale and send to database using grayscale handler
-                if self.grayscale_handler:
-                    # Use grayscale handler for one-step conversion + JPEG encoding
-                    gray_jpeg_data = self.grayscale_handler.get_grayscale_jpeg(bgr_frame, quality=80)
-                    
-                    if gray_jpeg_data:
-                        # Send to database in background thread
-                        threading.Thread(
-                            target=self.send_frame_to_database,
-                            args=(gray_jpeg_data,),
-                            daemon=True,
-                        ).start()
-                    
-                    # Get grayscale 3-channel frame for face detection
-                    gray_frame_bgr = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2GRAY)
-                    gray_frame_bgr = cv2.cvtColor(gray_frame_bgr, cv2.COLOR_GRAY2BGR)
-                else:
-                    # Fallback to manual grayscale conversion
-                    gray_frame_bgr = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2GRAY)
-                    gray_frame_bgr = cv2.cvtColor(gray_frame_bgr, cv2.COLOR_GRAY2BGR)
-                    
-                    # Manual JPEG encoding for database
-                    gray_encode_param = [cv2.IMWRITE_JPEG_QUALITY, 80]
-                    gray_success, gray_jpeg_buffer = cv2.imencode(".jpg", gray_frame_bgr, gray_encode_param)
-                    
-                    if gray_success:
-                        gray_jpeg_data = gray_jpeg_buffer.tobytes()
-                        threading.Thread(
-                            target=self.send_frame_to_database,
-                            args=(gray_jpeg_data,),
-                            daemon=True,
-                        ).start()
+                # Step 1: Capture grayscale (Y plane) frame (rate-limited)
+                gray_frame, is_new = self._capture_frame()
+
+                # Step 2: Grayscale is shared by database upload, face
+                # detection and the final single-channel encode
+                output_frame = gray_frame
+
+                # Step 3: Send grayscale to database (new frames only); the
+                # upload worker encodes the copy after the lock is released
+                if is_new:
+                    self.send_frame_to_database_async(gray_frame=gray_frame.copy())
 
                 # Step 4: Add face detection to grayscale image (more efficient)
                 if self.face_detection_enabled:
-                    # Apply face detection on the grayscale image
-                    gray_single_channel = cv2.cvtColor(gray_frame_bgr, cv2.COLOR_BGR2GRAY)
-                    gray_frame_bgr = self.process_frame_with_faces_on_grayscale(gray_single_channel, gray_frame_bgr)
-
-                # Step 5: Compress using compression handler 
-                if self.compression_handler:
-                    # Use simplified compression handler
-                    compressed_data = self.compression_handler.compress_image(gray_frame_bgr, quality=85)
-                    if compressed_data:
-                        return compressed_data
-                    else:
-                        # Fallback to basic encoding if compression handler fails
-                        encode_param = [cv2.IMWRITE_JPEG_QUALITY, 85]
-                        success, jpeg_buffer = cv2.imencode(".jpg", gray_frame_bgr, encode_param)
-                        return jpeg_buffer.tobytes() if success else None
-                else:
-                    # Use basic JPEG encoding
-                    encode_param = [cv2.IMWRITE_JPEG_QUALITY, 85]
-                    success, jpeg_buffer = cv2.imencode(".jpg", gray_frame_bgr, encode_param)
-                    
-                    if success:
-                        return jpeg_buffer.tobytes()
-                    else:
-                        print("JPEG encoding failed")
-                        return None
+                    output_frame = self.process_frame_with_faces_on_grayscale(gray_frame)
+
+                # Step 5: Compress (compression handler, or basic encoding)
+                return self._compress(output_frame, 85)
 
         except Exception as e:
             print(f"Capture error: {e}")
             return None
 
-    def capture_grayscale_jpeg_with_faces(self):
+    def capture_grayscale_jpeg_with_faces(self, quality=STREAM_QUALITY_MAX):
         """Capture a grayscale JPEG frame with face detection for streaming"""
         try:
             with self.lock:
-                # Capture frame
-                frame = self.picam2.capture_array()
-
-                # Convert RGB to BGR
-                bgr_frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-                # Convert to grayscale first (more efficient)
-                gray_frame = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2GRAY)
-                gray_3ch = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR)
+                # Capture grayscale (Y plane) frame (rate-limited)
+                gray_frame, is_new = self._capture_frame()
 
                 # Apply face detection on grayscale (more efficient)
                 if self.face_detection_enabled:
-                    gray_3ch = self.process_frame_with_faces_on_grayscale(gray_frame, gray_3ch)
+                    gray_frame = self.process_frame_with_faces_on_grayscale(gray_frame)
 
                 # Convert to JPEG using simplified grayscale handler
-                if self.grayscale_handler:
-                    jpeg_data = self.grayscale_handler.get_grayscale_jpeg(gray_3ch, quality=80)
-                else:
-                    # Fallback to basic grayscale encoding
-                    encode_param = [cv2.IMWRITE_JPEG_QUALITY, 80]
-                    success, jpeg_buffer = cv2.imencode(".jpg", gray_3ch, encode_param)
-
-                    if success:
-                        jpeg_data = jpeg_buffer.tobytes()
+                jpeg_data = self._encode_grayscale(gray_frame, quality)
+
+                # Send frame to database server (skip reused frames), always
+                # at UPLOAD_QUALITY: while the stream is degraded, the upload
+                # worker re-encodes a copy after the lock is released
+                if jpeg_data and is_new:
+                    if quality == UPLOAD_QUALITY:
+                        self.send_frame_to_database_async(jpeg_data)
                     else:
-                        jpeg_data = None
-
-                # Send frame to database server
-                if jpeg_data:
-                    # Send to database in background thread to avoid blocking
-                    threading.Thread(
-                        target=self.send_frame_to_database,
-                        args=(jpeg_data,),
-                        daemon=True,
-                    ).start()
+                        self.send_frame_to_database_async(gray_frame=gray_frame.copy())
 
                 return jpeg_data
 
@@ -380,28 +471,48 @@ def mjpeg_stream():
     """MJPEG grayscale stream with face detection - for browsers or advanced ESP32 implementations"""
 
     def generate():
-        while True:
-            try:
-                jpeg_data = camera_server.capture_grayscale_jpeg_with_faces()
-                if jpeg_data:
-                    yield (
-                        b"--frame\r\n"
-                        b"Content-Type: image/jpeg\r\n"
-                        b"Content-Length: "
-                        + str(len(jpeg_data)).encode()
-                        + b"\r\n\r\n"
-                        + jpeg_data
-                        + b"\r\n"
-                    )
-                else:
-                    time.sleep(0.1)  # Brief pause on error
-
-                # Small delay to prevent overwhelming the ESP32
-                time.sleep(0.1)  # ~10 FPS
-
-            except Exception as e:
-                print(f"Stream error: {e}")
-                break
+        # Absolute deadlines, so encode/send time is absorbed instead of
+        # added on top of a fixed sleep
+        period = 1.0 / STREAM_FPS
+        next_deadline = time.monotonic()
+
+        # Quality follows how quickly this client takes frames (EWMA)
+        quality = STREAM_QUALITY_MAX
+        send_time = 0.0
+        try:
+            while True:
+                try:
+                    jpeg_data = camera_server.capture_grayscale_jpeg_with_faces(quality)
+                    if jpeg_data:
+                        sent_at = time.monotonic()
+                        yield (
+                            b"--frame\r\n"
+                            b"Content-Type: image/jpeg\r\n"
+                            b"Content-Length: "
+                            + str(len(jpeg_data)).encode()
+                            + b"\r\n\r\n"
+                            + jpeg_data
+                            + b"\r\n"
+                        )
+                        # Resumed once the part is written to the client
+                        send_time = 0.8 * send_time + 0.2 * (time.monotonic() - sent_at)
+                        quality = adapt_stream_quality(quality, send_time, period)
+
+                    # Wait for the next frame slot; after a slow frame, restart the
+                    # schedule from now rather than bursting to catch up
+                    next_deadline = max(next_deadline + period, time.monotonic())
+                    delay = next_deadline - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                except Exception as e:
+                    print(f"Stream error: {e}")
+                    break
+        finally:
+            # Client went away: kept despite the raised GC thresholds, since
+            # full collections are now rare and this is where cycles left by
+            # the finished stream get reclaimed (cheap with the frozen heap)
+            gc.collect()
 
     return Response(generate(), mimetype="multipart/x-mixed-replace; boundary=frame")
 
@@ -460,8 +571,16 @@ def main():
         print(f"\nDatabase server: {DATABASE_SERVER_IP}:{DATABASE_SERVER_PORT}")
         print("All captured frames will be sent to database after grayscaling")
 
-        # Force garbage collection
+        # Collect startup garbage, then move everything that survived (modules,
+        # camera, detector) out of the collector's view so later collections
+        # only scan per-request objects
         gc.collect()
+        gc.freeze()
+
+        # Steady-state streaming creates little cyclic garbage: collect gen 0
+        # rarely and push full collections far out (a gen-2 threshold of 0
+        # would not disable gen-2 collections)
+        gc.set_threshold(10000, 50, 100)
 
         # Start Flask server
         app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
@@ -11,7 +11,6 @@ from .grayscale_handler import (
 # Compression Handler
 from .compression_handler import (
     CompressionHandler,
-    CompressionFormat,
     create_compression_handler,
     quick_jpeg_compress,
 )
@@ -28,7 +27,6 @@ __all__ = [
     "quick_grayscale",
     # Compression
     "CompressionHandler",
-    "CompressionFormat",
     "create_compression_handler",
     "quick_jpeg_compress",
 ]
@@ -6,8 +6,115 @@ Simplified for ESP32 integration - JPEG only
 
 import cv2
 import numpy as np
+import platform
 from typing import Optional
 
+# Optional encoder: PyTurboJPEG calls the system libjpeg-turbo (NEON on ARM)
+# directly; the constructor fails if the shared library is not installed
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_GRAY, TJSAMP_420, TJSAMP_GRAY
+
+    _turbojpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError, RuntimeError):
+    TURBOJPEG_AVAILABLE = False
+
+# Optional encoder: simplejpeg bundles libjpeg-turbo with SIMD in its wheel
+try:
+    import simplejpeg
+
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+
+def _check_jpeg_build() -> bool:
+    """
+    Check that OpenCV encodes JPEG through libjpeg-turbo with SIMD enabled
+
+    Returns:
+        True if the fast encoder path was found, False otherwise
+    """
+    jpeg_line = ""
+    simd_lines = ""
+    for line in cv2.getBuildInformation().splitlines():
+        line = line.strip()
+        if line.startswith("JPEG:"):
+            jpeg_line = line
+        elif line.startswith(("Baseline:", "Dispatched code generation:")):
+            simd_lines += line
+
+    ok = True
+    # Only "turbo" identifies libjpeg-turbo: IJG libjpeg 6b also reports "ver 62"
+    if "turbo" not in jpeg_line:
+        print(f"Warning: OpenCV JPEG backend may not be libjpeg-turbo ({jpeg_line or 'unknown'})")
+        ok = False
+
+    if platform.machine().startswith(("arm", "aarch64")) and "NEON" not in simd_lines:
+        print("Warning: OpenCV was built without NEON, JPEG encoding will be slow")
+        ok = False
+
+    return ok
+
+
+# Checked once at import, the OpenCV build does not change at runtime
+JPEG_BUILD_OK = _check_jpeg_build()
+
+# Encoder used by quick_jpeg_compress, probed once in order of preference
+if TURBOJPEG_AVAILABLE:
+    JPEG_BACKEND = "turbojpeg"
+elif SIMPLEJPEG_AVAILABLE:
+    JPEG_BACKEND = "simplejpeg"
+else:
+    JPEG_BACKEND = "cv2"
+
+# Encoder used by the handlers: TurboJPEG whenever it is installed (direct
+# libjpeg-turbo, no imencode parameter marshalling), otherwise cv2.imencode
+# unless OpenCV's own JPEG build failed the check above and a SIMD
+# libjpeg-turbo backend is available instead
+HANDLERS_USE_JPEG_BACKEND = JPEG_BACKEND == "turbojpeg" or (
+    not JPEG_BUILD_OK and JPEG_BACKEND != "cv2"
+)
+
+
+def _encode_jpeg_backend(frame: np.ndarray, quality: int) -> Optional[bytes]:
+    """
+    Encode a BGR or single-channel frame as JPEG with the selected backend
+
+    Args:
+        frame: Input BGR (HxWx3) or grayscale (HxW) frame
+        quality: JPEG quality setting (1-100)
+
+    Returns:
+        JPEG bytes or None if encoding fails
+    """
+    if JPEG_BACKEND == "turbojpeg":
+        if frame.ndim == 2:
+            pixel_format, subsample = TJPF_GRAY, TJSAMP_GRAY
+        else:
+            pixel_format, subsample = TJPF_BGR, TJSAMP_420
+        return _turbojpeg.encode(
+            np.ascontiguousarray(frame),
+            quality=quality,
+            pixel_format=pixel_format,
+            jpeg_subsample=subsample,
+        )
+
+    if JPEG_BACKEND == "simplejpeg":
+        if frame.ndim == 2:
+            frame, colorspace = frame[:, :, None], "GRAY"
+        else:
+            colorspace = "BGR"
+        return simplejpeg.encode_jpeg(
+            np.ascontiguousarray(frame),
+            quality=quality,
+            colorspace=colorspace,
+            colorsubsampling="420",
+        )
+
+    success, jpeg_buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return jpeg_buffer.tobytes() if success else None
+
 
 class CompressionHandler:
     """
@@ -43,27 +150,34 @@ class CompressionHandler:
         if quality is None:
             quality = self.default_quality
 
-        try:
-            # JPEG compression parameters optimized for ESP32
-            params = [
-                cv2.IMWRITE_JPEG_QUALITY, quality,
-                cv2.IMWRITE_JPEG_PROGRESSIVE, 0,  # Non-progressive for faster ESP32 decode
-                cv2.IMWRITE_JPEG_OPTIMIZE, 1      # Optimize for smaller file size
-            ]
-
-            # Compress image
-            success, compressed_buffer = cv2.imencode(".jpg", frame, params)
-
-            if success:
-                return compressed_buffer.tobytes()
-            else:
-                print("JPEG compression failed")
+        if HANDLERS_USE_JPEG_BACKEND:
+            try:
+                return _encode_jpeg_backend(frame, quality)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Compression error: {e}")
                 return None
 
-        except Exception as e:
+        # JPEG compression parameters optimized for ESP32, built per call so
+        # one handler can be shared between threads
+        params = [
+            cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0,  # Non-progressive for faster ESP32 decode
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0      # Single pass, no Huffman optimization pass
+        ]
+
+        # Compress image (only the encoder call can raise)
+        try:
+            success, compressed_buffer = cv2.imencode(".jpg", frame, params)
+        except cv2.error as e:
             print(f"Compression error: {e}")
             return None
 
+        if success:
+            return compressed_buffer.tobytes()
+        else:
+            print("JPEG compression failed")
+            return None
+
 
 # Helper function for easy integration
 def create_compression_handler(esp32_optimized: bool = True) -> CompressionHandler:
@@ -80,3 +194,21 @@ def create_compression_handler(esp32_optimized: bool = True) -> CompressionHandl
         return CompressionHandler(default_quality=75)
     else:
         return CompressionHandler(default_quality=90)
+
+
+def quick_jpeg_compress(frame: np.ndarray, quality: int = 85) -> Optional[bytes]:
+    """
+    One-shot JPEG compression without creating a handler
+
+    Args:
+        frame: Input BGR or grayscale frame
+        quality: JPEG quality setting (1-100)
+
+    Returns:
+        Compressed JPEG bytes or None if compression fails
+    """
+    try:
+        return _encode_jpeg_backend(frame, quality)
+    except Exception as e:
+        print(f"Compression error: {e}")
+        return None
@@ -8,6 +8,12 @@ import cv2
 import numpy as np
 from typing import Optional
 
+# Shared JPEG backend selection (package import, or lib/ on sys.path)
+try:
+    from .compression_handler import HANDLERS_USE_JPEG_BACKEND, _encode_jpeg_backend
+except ImportError:
+    from compression_handler import HANDLERS_USE_JPEG_BACKEND, _encode_jpeg_backend
+
 
 class GrayscaleHandler:
     """
@@ -23,25 +29,33 @@ class GrayscaleHandler:
         self, frame: np.ndarray, quality: int = 85
     ) -> Optional[bytes]:
         """
-        Convert frame to grayscale and encode as JPEG
+        Convert frame to grayscale and encode as a single-channel JPEG
 
         Args:
-            frame: Input BGR frame
+            frame: Input BGR frame, or an already grayscale (HxW) frame
             quality: JPEG quality (1-100)
 
         Returns:
             JPEG encoded bytes or None if encoding fails
         """
         try:
-            # Convert to grayscale
-            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Convert back to 3-channel for JPEG encoding
-            gray_3ch = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR)
+            # Convert to grayscale (skipped if the caller already did)
+            if frame.ndim == 2:
+                gray_frame = frame
+            else:
+                gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+            # Encode luminance only, no need to expand back to 3 channels
+            if HANDLERS_USE_JPEG_BACKEND:
+                return _encode_jpeg_backend(gray_frame, quality)
 
-            # Encode as JPEG
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-            success, jpeg_buffer = cv2.imencode(".jpg", gray_3ch, encode_params)
+            # Single-pass encode: no Huffman optimization pass for streaming.
+            # Built per call so one handler can be shared between threads
+            encode_params = [
+                cv2.IMWRITE_JPEG_QUALITY, quality,
+                cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+            ]
+            success, jpeg_buffer = cv2.imencode(".jpg", gray_frame, encode_params)
 
             if success:
                 return jpeg_buffer.tobytes()
@@ -62,3 +76,18 @@ def create_grayscale_handler(esp32_optimized: bool = True) -> GrayscaleHandler:
         Configured GrayscaleHandler instance
     """
     return GrayscaleHandler()
+
+
+def quick_grayscale(frame: np.ndarray) -> np.ndarray:
+    """
+    One-shot BGR to grayscale conversion without creating a handler
+
+    Args:
+        frame: Input BGR frame (returned unchanged if already single-channel)
+
+    Returns:
+        Single-channel grayscale frame
+    """
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)